@@ -1,8 +1,71 @@
 # -*- coding: utf-8 -*-
 # Copyright (c) 2020, Frappe Technologies and Contributors
 # License: MIT. See LICENSE
-# import frappe
 import unittest
+from datetime import datetime
+
+import frappe
+from frappe.core.doctype.log_settings.log_settings import run_log_clean_up
+from frappe.utils import add_to_date, now_datetime
+
 
 class TestLogSettings(unittest.TestCase):
-	pass
+	@classmethod
+	def setUpClass(cls):
+		cls.savepoint = "TestLogSettings"
+		# the test runner already holds an open transaction, an explicit
+		# `begin` would implicitly commit it on MariaDB
+		frappe.db.savepoint(cls.savepoint)
+
+		try:
+			frappe.db.set_value("Log Settings", "Log Settings", {
+				"clear_error_log_after": 1,
+				"clear_activity_log_after": 1,
+				"clear_email_queue_after": 1,
+			})
+		except Exception:
+			cls.rollback_savepoint()
+			raise
+
+	@classmethod
+	def tearDownClass(cls):
+		cls.rollback_savepoint()
+
+	@classmethod
+	def rollback_savepoint(cls):
+		frappe.db.rollback(save_point=cls.savepoint)
+		frappe.db.release_savepoint(cls.savepoint)
+
+	def setUp(self):
+		self.past = add_to_date(now_datetime(), days=-4)
+		setup_test_logs(self.past)
+
+	def test_delete_logs(self):
+		# make sure the fixtures from setUp actually left something to clean up
+		self.assertNotIn(0, self.get_old_log_counts())
+
+		run_log_clean_up()
+
+		self.assertEqual(self.get_old_log_counts(), (0, 0, 0))
+
+	def get_old_log_counts(self):
+		return tuple(frappe.db.sql("""SELECT
+			(SELECT COUNT(*) FROM `tabActivity Log` WHERE `creation` <= %(past)s),
+			(SELECT COUNT(*) FROM `tabError Log` WHERE `creation` <= %(past)s),
+			(SELECT COUNT(*) FROM `tabEmail Queue` WHERE `modified` <= %(past)s)""",
+			{"past": self.past})[0])
+
+
+def setup_test_logs(past: datetime) -> None:
+	# rows are inserted directly with a backdated `creation` as the
+	# controllers play no part in what the clean up removes
+	fields = ["name", "creation", "modified", "owner", "docstatus"]
+
+	frappe.db.bulk_insert("Activity Log", fields=fields + ["subject", "full_name"],
+		values=[(frappe.generate_hash(length=10), past, past, "Administrator", 0, "Test subject", "test user2")])
+
+	frappe.db.bulk_insert("Error Log", fields=fields + ["method", "error"],
+		values=[(frappe.generate_hash(length=10), past, past, "Administrator", 0, "test_method", "traceback")])
+
+	frappe.db.bulk_insert("Email Queue", fields=fields + ["sender", "message", "priority"],
+		values=[(frappe.generate_hash(length=10), past, past, "Administrator", 0, "test1@example.com", "This is a test email", 0)])
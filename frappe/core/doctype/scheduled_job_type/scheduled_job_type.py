@@ -22,7 +22,7 @@ class ScheduledJobType(Document):
 			# force logging for all events other than continuous ones (ALL)
 			self.create_log = 1
 
-	def enqueue(self, force=False):
+	def enqueue(self, force=False, queued_jobs=None):
 		# enqueue event if last execution is done
 		if self.is_event_due() or force:
 			if frappe.flags.enqueued_jobs:
@@ -31,7 +31,7 @@ class ScheduledJobType(Document):
 			if frappe.flags.execute_job:
 				self.execute()
 			else:
-				if not self.is_job_in_queue():
+				if not self.is_job_in_queue(queued_jobs):
 					enqueue('frappe.core.doctype.scheduled_job_type.scheduled_job_type.run_scheduled_job',
 						queue = self.get_queue_name(), job_type=self.method)
 					return True
@@ -43,8 +43,11 @@ class ScheduledJobType(Document):
 		# if the next scheduled event is before NOW, then its due!
 		return self.get_next_execution() <= (current_time or now_datetime())
 
-	def is_job_in_queue(self):
-		queued_jobs = get_jobs(site=frappe.local.site, key='job_type')[frappe.local.site]
+	def is_job_in_queue(self, queued_jobs=None):
+		'''Return true if the job is already queued, `queued_jobs` can be passed
+		to avoid fetching the queued jobs again when called in a loop'''
+		if queued_jobs is None:
+			queued_jobs = get_jobs(site=frappe.local.site, key='job_type')[frappe.local.site]
 		return self.method in queued_jobs
 
 	def get_next_execution(self):
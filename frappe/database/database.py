@@ -1108,7 +1108,7 @@ class Database(object):
 
 		for idx, value in enumerate(values):
 			insert_list.append(tuple(value))
-			if idx and (idx%10000 == 0 or idx < len(values)-1):
+			if len(insert_list) == 10000 or idx == len(values) - 1:
 				self.sql("""INSERT {ignore_duplicates} INTO `tab{doctype}` ({fields}) VALUES {values}""".format(
 						ignore_duplicates="IGNORE" if ignore_duplicates else "",
 						doctype=doctype,
@@ -131,6 +131,9 @@ OPERATOR_MAP = {
 					"between": func_between
 				}
 
+# operators whose wrapper builds the Field from the key itself
+KEY_OPERATORS = frozenset({"like", "not like", "regex", "between"})
+
 
 class Query:
 	def get_condition(self, table: str, **kwargs) -> frappe.qb:
@@ -237,7 +240,7 @@ class Query:
 				conditions = conditions.where(make_function(key, value))
 				continue
 			if isinstance(value, (list, tuple)):
-				if isinstance(value[1], (list, tuple)) or value[0] in list(OPERATOR_MAP.keys())[-4:]:
+				if isinstance(value[1], (list, tuple)) or value[0] in KEY_OPERATORS:
 					_operator = OPERATOR_MAP[value[0]]
 					conditions = conditions.where(_operator(key, value[1]))
 				else:
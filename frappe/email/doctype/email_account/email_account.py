@@ -714,7 +714,7 @@ def pull(now=False):
 			frappe.cache().set_value("workers:no-internet", False)
 		else:
 			return
-	queued_jobs = get_jobs(site=frappe.local.site, key='job_name')[frappe.local.site]
+	queued_jobs = set(get_jobs(site=frappe.local.site, key='job_name')[frappe.local.site])
 	for email_account in frappe.get_list("Email Account",
 		filters={"enable_incoming": 1, "awaiting_password": 0}):
 		if now:
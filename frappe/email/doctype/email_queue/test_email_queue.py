@@ -3,8 +3,26 @@
 # License: MIT. See LICENSE
 import frappe
 import unittest
+from unittest.mock import patch
+
+from frappe.email.queue import clear_outbox
+from frappe.utils import add_to_date, now_datetime
 
 # test_records = frappe.get_test_records('Email Queue')
 
 class TestEmailQueue(unittest.TestCase):
-	pass
+	def test_clear_outbox_in_batches(self):
+		past = add_to_date(now_datetime(), days=-4)
+		names = [frappe.generate_hash(length=10) for _ in range(3)]
+
+		frappe.db.bulk_insert("Email Queue",
+			fields=["name", "creation", "modified", "owner", "docstatus", "sender", "message", "priority"],
+			values=[(name, past, past, "Administrator", 0, "test1@example.com", "This is a test email", 0) for name in names])
+		self.assertEqual(frappe.db.count("Email Queue", {"name": ("in", names)}), 3)
+
+		with patch("frappe.email.queue.CLEAR_OUTBOX_BATCH_SIZE", 1), patch.object(frappe.db, "commit") as commit:
+			clear_outbox(days=1)
+
+		self.assertEqual(frappe.db.count("Email Queue", {"name": ("in", names)}), 0)
+		# one commit after every full batch
+		self.assertGreaterEqual(commit.call_count, 3)
@@ -6,6 +6,8 @@ from frappe import msgprint, _
 from frappe.utils.verified_command import get_signed_params, verify_request
 from frappe.utils import get_url, now_datetime, cint
 
+CLEAR_OUTBOX_BATCH_SIZE = 10000
+
 def get_emails_sent_this_month(email_account=None):
 	"""Get count of emails sent from a specific email account.
 
@@ -165,17 +167,31 @@ def get_queue():
 def clear_outbox(days=None):
 	"""Remove low priority older than 31 days in Outbox or configured in Log Settings.
 	Note: Used separate query to avoid deadlock
+
+	Rows are deleted in batches of `CLEAR_OUTBOX_BATCH_SIZE` and the transaction is
+	committed between batches, along with any work pending from the caller.
 	"""
 	if not days:
 		days=31
 
-	email_queues = frappe.db.sql_list("""SELECT `name` FROM `tabEmail Queue`
-		WHERE `priority`=0 AND `modified` < (NOW() - INTERVAL '{0}' DAY)""".format(days))
+	# delete in batches so that a large backlog is not loaded into memory
+	# and removed in a single long running transaction
+	while True:
+		email_queues = frappe.db.sql_list("""SELECT `name` FROM `tabEmail Queue`
+			WHERE `priority`=0 AND `modified` < (NOW() - INTERVAL '{0}' DAY)
+			LIMIT {1}""".format(days, CLEAR_OUTBOX_BATCH_SIZE))
+
+		if not email_queues:
+			break
 
-	if email_queues:
 		frappe.db.delete("Email Queue", {"name": ("in", email_queues)})
 		frappe.db.delete("Email Queue Recipient", {"parent": ("in", email_queues)})
 
+		if len(email_queues) < CLEAR_OUTBOX_BATCH_SIZE:
+			break
+
+		frappe.db.commit()
+
 def set_expiry_for_email_queue():
 	''' Mark emails as expire that has not sent for 7 days.
 		Called daily via scheduler.
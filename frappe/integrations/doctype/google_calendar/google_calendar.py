@@ -16,12 +16,23 @@ import frappe
 from frappe import _
 from frappe.integrations.doctype.google_settings.google_settings import get_auth_url
 from frappe.model.document import Document
-from frappe.utils import (add_days, add_to_date, get_datetime,
+from frappe.utils import (add_days, add_to_date, cint, get_datetime, getdate,
 	get_request_site_address, get_time_zone, get_weekdays, now_datetime)
+from frappe.utils.background_jobs import get_jobs
 from frappe.utils.password import set_encrypted_password
 
 SCOPES = "https://www.googleapis.com/auth/calendar"
 
+# Google access tokens are valid for an hour
+ACCESS_TOKEN_CACHE_TTL = 3500
+
+# Reuse connections to Google's token endpoint across token requests
+session = requests.Session()
+session.mount("https://", requests.adapters.HTTPAdapter(pool_maxsize=16))
+
+# Partial response, only the parts of an event that are synced are fetched
+EVENT_LIST_FIELDS = "nextPageToken,nextSyncToken,items(id,status,summary,description,start,end,recurrence)"
+
 google_calendar_frequencies = {
 	"RRULE:FREQ=DAILY": "Daily",
 	"RRULE:FREQ=WEEKLY": "Weekly",
@@ -39,22 +50,9 @@ google_calendar_days = {
 	"SU": "sunday"
 }
 
-framework_frequencies = {
-	"Daily": "RRULE:FREQ=DAILY;",
-	"Weekly": "RRULE:FREQ=WEEKLY;",
-	"Monthly": "RRULE:FREQ=MONTHLY;",
-	"Yearly": "RRULE:FREQ=YEARLY;"
-}
+framework_frequencies = {frequency: rule + ";" for rule, frequency in google_calendar_frequencies.items()}
 
-framework_days = {
-	"monday": "MO",
-	"tuesday": "TU",
-	"wednesday": "WE",
-	"thursday": "TH",
-	"friday": "FR",
-	"saturday": "SA",
-	"sunday": "SU"
-}
+framework_days = {day: google_calendar_day for google_calendar_day, day in google_calendar_days.items()}
 
 class GoogleCalendar(Document):
 
@@ -68,6 +66,10 @@ class GoogleCalendar(Document):
 
 		return google_settings
 
+	def on_update(self):
+		if self.has_value_changed("refresh_token"):
+			frappe.cache().delete_value(self.get_access_token_cache_key())
+
 	def get_access_token(self):
 		google_settings = self.validate()
 
@@ -75,6 +77,16 @@ class GoogleCalendar(Document):
 			button_label = frappe.bold(_("Allow Google Calendar Access"))
 			raise frappe.ValidationError(_("Click on {0} to generate Refresh Token.").format(button_label))
 
+		# access tokens are valid for an hour, reuse the one fetched earlier
+		# on this document instead of requesting a new one for every call
+		if getattr(self, "_access_token", None) and self._access_token_expiry > now_datetime():
+			return self._access_token
+
+		# tokens are shared across requests and workers through the cache
+		cached_token = frappe.cache().get_value(self.get_access_token_cache_key())
+		if cached_token:
+			return cached_token
+
 		data = {
 			"client_id": google_settings.client_id,
 			"client_secret": google_settings.get_password(fieldname="client_secret", raise_exception=False),
@@ -84,12 +96,24 @@ class GoogleCalendar(Document):
 		}
 
 		try:
-			r = requests.post(get_auth_url(), data=data).json()
+			r = session.post(get_auth_url(), data=data).json()
 		except requests.exceptions.HTTPError:
 			button_label = frappe.bold(_("Allow Google Calendar Access"))
 			frappe.throw(_("Something went wrong during the token generation. Click on {0} to generate a new one.").format(button_label))
 
-		return r.get("access_token")
+		self._access_token = r.get("access_token")
+		# keep a margin so that an expiring token is never handed out
+		expires_in = cint(r.get("expires_in")) - 60
+		self._access_token_expiry = add_to_date(now_datetime(), seconds=expires_in)
+
+		if self._access_token and expires_in > 0:
+			frappe.cache().set_value(self.get_access_token_cache_key(), self._access_token,
+				expires_in_sec=min(ACCESS_TOKEN_CACHE_TTL, expires_in))
+
+		return self._access_token
+
+	def get_access_token_cache_key(self):
+		return "google_calendar_access_token:{0}".format(self.name)
 
 @frappe.whitelist()
 def authorize_access(g_calendar, reauthorize=None):
@@ -114,11 +138,12 @@ def authorize_access(g_calendar, reauthorize=None):
 				"redirect_uri": redirect_uri,
 				"grant_type": "authorization_code"
 			}
-			r = requests.post(get_auth_url(), data=data).json()
+			r = session.post(get_auth_url(), data=data).json()
 
 			if "refresh_token" in r:
 				frappe.db.set_value("Google Calendar", google_calendar.name, "refresh_token", r.get("refresh_token"))
 				frappe.db.commit()
+				frappe.cache().delete_value(google_calendar.get_access_token_cache_key())
 
 			frappe.local.response["type"] = "redirect"
 			frappe.local.response["location"] = "/app/Form/{0}/{1}".format(quote("Google Calendar"), quote(google_calendar.name))
@@ -150,10 +175,20 @@ def sync(g_calendar=None):
 	if g_calendar:
 		filters.update({"name": g_calendar})
 
-	google_calendars = frappe.get_list("Google Calendar", filters=filters)
+	# get_list also checks that the user is permitted to read the Google Calendar
+	google_calendars = frappe.get_list("Google Calendar", filters=filters, pluck="name")
 
+	if g_calendar:
+		return sync_events_from_google_calendar(google_calendars[0]) if google_calendars else None
+
+	# sync the accounts in parallel, each in its own background job
+	queued_jobs = set(get_jobs(site=frappe.local.site, key="job_name")[frappe.local.site])
 	for g in google_calendars:
-		return sync_events_from_google_calendar(g.name)
+		# job_name is used to prevent duplicates in queue
+		job_name = "sync_events_from_google_calendar|{0}".format(g)
+
+		if job_name not in queued_jobs:
+			frappe.enqueue(sync_events_from_google_calendar, queue="long", job_name=job_name, g_calendar=g)
 
 def get_google_calendar_object(g_calendar):
 	"""
@@ -181,7 +216,6 @@ def get_google_calendar_object(g_calendar):
 
 	check_google_calendar(account, google_calendar)
 
-	account.load_from_db()
 	return google_calendar, account
 
 def check_google_calendar(account, google_calendar):
@@ -189,7 +223,6 @@ def check_google_calendar(account, google_calendar):
 		Checks if Google Calendar is present with the specified name.
 		If not, creates one.
 	"""
-	account.load_from_db()
 	try:
 		if account.google_calendar_id:
 			google_calendar.calendars().get(calendarId=account.google_calendar_id).execute()
@@ -197,10 +230,10 @@ def check_google_calendar(account, google_calendar):
 			# If no Calendar ID create a new Calendar
 			calendar = {
 				"summary": account.calendar_name,
-				"timeZone": frappe.db.get_single_value("System Settings", "time_zone")
+				"timeZone": get_time_zone()
 			}
 			created_calendar = google_calendar.calendars().insert(body=calendar).execute()
-			frappe.db.set_value("Google Calendar", account.name, "google_calendar_id", created_calendar.get("id"))
+			account.db_set("google_calendar_id", created_calendar.get("id"))
 			frappe.db.commit()
 	except HttpError as err:
 		frappe.throw(_("Google Calendar - Could not create Calendar for {0}, error code {1}.").format(account.name, err.resp.status))
@@ -224,7 +257,8 @@ def sync_events_from_google_calendar(g_calendar, method=None):
 		try:
 			# API Response listed at EOF
 			events = google_calendar.events().list(calendarId=account.google_calendar_id, maxResults=2000,
-				pageToken=events.get("nextPageToken"), singleEvents=False, showDeleted=True, syncToken=sync_token).execute()
+				pageToken=events.get("nextPageToken"), singleEvents=False, showDeleted=True, syncToken=sync_token,
+				fields=EVENT_LIST_FIELDS).execute()
 		except HttpError as err:
 			msg = _("Google Calendar - Could not fetch event from Google Calendar, error code {0}.").format(err.resp.status)
 
@@ -245,6 +279,17 @@ def sync_events_from_google_calendar(g_calendar, method=None):
 				account.save()
 			break
 
+	# fetch the already synced Events at once instead of one lookup per Google Calendar Event
+	synced_events = {}
+	if results:
+		synced_events = {d.google_calendar_event_id: d for d in frappe.get_all("Event",
+			filters={
+				"google_calendar": account.name,
+				"google_calendar_event_id": ("in", [event.get("id") for event in results])
+			},
+			fields=["name", "google_calendar_event_id", "google_calendar_id"])}
+
+	closed_events = []
 	for idx, event in enumerate(results):
 		frappe.publish_realtime("import_google_calendar", dict(progress=idx+1, total=len(results)), user=frappe.session.user)
 
@@ -257,23 +302,31 @@ def sync_events_from_google_calendar(g_calendar, method=None):
 				except IndexError:
 					pass
 
-			if not frappe.db.exists("Event", {"google_calendar_event_id": event.get("id")}):
+			synced_event = synced_events.get(event.get("id"))
+			if not synced_event:
 				insert_event_to_calendar(account, event, recurrence)
 			else:
-				update_event_in_calendar(account, event, recurrence)
+				update_event_in_calendar(account, event, recurrence, synced_event.name)
 		elif event.get("status") == "cancelled":
 			# If any synced Google Calendar Event is cancelled, then close the Event
-			frappe.db.set_value("Event", {"google_calendar_id": account.google_calendar_id, "google_calendar_event_id": event.get("id")}, "status", "Closed")
+			synced_event = synced_events.get(event.get("id"))
+			if not synced_event or synced_event.google_calendar_id != account.google_calendar_id:
+				continue
+
+			closed_events.append(synced_event.name)
 			frappe.get_doc({
 				"doctype": "Comment",
 				"comment_type": "Info",
 				"reference_doctype": "Event",
-				"reference_name": frappe.db.get_value("Event", {"google_calendar_id": account.google_calendar_id, "google_calendar_event_id": event.get("id")}, "name"),
+				"reference_name": synced_event.name,
 				"content": " - Event deleted from Google Calendar.",
 			}).insert(ignore_permissions=True)
 		else:
 			pass
 
+	if closed_events:
+		close_cancelled_events(closed_events)
+
 	if not results:
 		return _("No Google Calendar Event to sync.")
 	elif len(results) == 1:
@@ -281,6 +334,21 @@ def sync_events_from_google_calendar(g_calendar, method=None):
 	else:
 		return _("{0} Google Calendar Events synced.").format(len(results))
 
+def close_cancelled_events(event_names):
+	"""
+		Closes the Events whose Google Calendar Events were cancelled, skipping the ones already closed
+	"""
+	event = frappe.qb.DocType("Event")
+	(frappe.qb.update(event)
+		.set(event.status, "Closed")
+		.set(event.modified, now_datetime())
+		.set(event.modified_by, frappe.session.user)
+		.where(
+			event.name.isin(event_names)
+			& (event.status != "Closed")
+		)
+	).run()
+
 def insert_event_to_calendar(account, event, recurrence=None):
 	"""
 		Inserts event in Frappe Calendar during Sync
@@ -298,16 +366,42 @@ def insert_event_to_calendar(account, event, recurrence=None):
 	calendar_event.update(google_calendar_to_repeat_on(recurrence=recurrence, start=event.get("start"), end=event.get("end")))
 	frappe.get_doc(calendar_event).insert(ignore_permissions=True)
 
-def update_event_in_calendar(account, event, recurrence=None):
+def update_event_in_calendar(account, event, recurrence=None, event_name=None):
 	"""
 		Updates Event in Frappe Calendar if any existing Google Calendar Event is updated
 	"""
-	calendar_event = frappe.get_doc("Event", {"google_calendar_event_id": event.get("id")})
-	calendar_event.subject = event.get("summary")
-	calendar_event.description = event.get("description")
-	calendar_event.update(google_calendar_to_repeat_on(recurrence=recurrence, start=event.get("start"), end=event.get("end")))
+	calendar_event = frappe.get_doc("Event", event_name or {"google_calendar_event_id": event.get("id")})
+
+	updated_values = {
+		"subject": event.get("summary"),
+		"description": event.get("description")
+	}
+	updated_values.update(google_calendar_to_repeat_on(recurrence=recurrence, start=event.get("start"), end=event.get("end")))
+
+	changed_values = {fieldname: value for fieldname, value in updated_values.items()
+		if get_comparable_event_value(fieldname, calendar_event.get(fieldname)) != get_comparable_event_value(fieldname, value)}
+
+	if not changed_values:
+		return
+
+	calendar_event.update(changed_values)
 	calendar_event.save(ignore_permissions=True)
 
+def get_comparable_event_value(fieldname, value):
+	"""
+		Returns the value of an Event field in a form that can be compared with the one built from Google Calendar
+	"""
+	if not value:
+		return None
+
+	if fieldname == "repeat_till":
+		return getdate(value)
+
+	if fieldname in ("starts_on", "ends_on"):
+		return get_datetime(value)
+
+	return value
+
 def insert_event_in_google_calendar(doc, method=None):
 	"""
 		Insert Events in Google Calendar if sync_with_google_calendar is checked.
@@ -418,43 +512,35 @@ def google_calendar_to_repeat_on(start, end, recurrence=None):
 
 	# recurrence rule "RRULE:FREQ=WEEKLY;BYDAY=MO,TU,TH"
 	if recurrence:
-		# google_calendar_frequency = RRULE:FREQ=WEEKLY, byday = BYDAY=MO,TU,TH, until = 20191028
+		# google_calendar_frequency = RRULE:FREQ=WEEKLY, byday = BYDAY=MO,TU,TH, until = UNTIL=20191028
 		google_calendar_frequency, until, byday = get_recurrence_parameters(recurrence)
 		repeat_on["repeat_on"] = google_calendar_frequencies.get(google_calendar_frequency)
+		repeat_till = datetime.strptime(until.partition("=")[2][:8], "%Y%m%d") if until else None
 
 		if repeat_on["repeat_on"] == "Daily":
 			repeat_on["ends_on"] = None
-			repeat_on["repeat_till"] = datetime.strptime(until, "%Y%m%d") if until else None
+			repeat_on["repeat_till"] = repeat_till
 
 		if byday and repeat_on["repeat_on"] == "Weekly":
-			repeat_on["repeat_till"] = datetime.strptime(until, "%Y%m%d") if until else None
-			byday = byday.split("=")[1].split(",")
-			for repeat_day in byday:
+			repeat_on["repeat_till"] = repeat_till
+			for repeat_day in byday.partition("=")[2].split(","):
 				repeat_on[google_calendar_days[repeat_day]] = 1
 
 		if byday and repeat_on["repeat_on"] == "Monthly":
-			byday = byday.split("=")[1]
-			repeat_day_week_number, repeat_day_name = None, None
-
-			for num in ["-2", "-1", "1", "2", "3", "4", "5"]:
-				if num in byday:
-					repeat_day_week_number = num
-					break
-
-			for day in ["MO","TU","WE","TH","FR","SA","SU"]:
-				if day in byday:
-					repeat_day_name = google_calendar_days.get(day)
-					break
+			# byday = 4TH or -1FR ie week number followed by the day, only the first one is used
+			# if several are set eg BYDAY=1MO,3MO
+			byday = byday.partition("=")[2].split(",")[0]
+			repeat_day_week_number, repeat_day_name = byday[:-2], google_calendar_days.get(byday[-2:])
 
 			# Only Set starts_on for the event to repeat monthly
 			start_date = parse_google_calendar_recurrence_rule(int(repeat_day_week_number), repeat_day_name)
 			repeat_on["starts_on"] = start_date
 			repeat_on["ends_on"] = add_to_date(start_date, minutes=5)
-			repeat_on["repeat_till"] = datetime.strptime(until, "%Y%m%d") if until else None
+			repeat_on["repeat_till"] = repeat_till
 
-		if repeat_on["repeat_till"] == "Yearly":
+		if repeat_on["repeat_on"] == "Yearly":
 			repeat_on["ends_on"] = None
-			repeat_on["repeat_till"] = datetime.strptime(until, "%Y%m%d") if until else None
+			repeat_on["repeat_till"] = repeat_till
 
 	return repeat_on
 
@@ -462,14 +548,15 @@ def format_date_according_to_google_calendar(all_day, starts_on, ends_on=None):
 	if not ends_on:
 		ends_on = starts_on + timedelta(minutes=10)
 
+	time_zone = get_time_zone()
 	date_format = {
 		"start": {
 			"dateTime": starts_on.isoformat(),
-			"timeZone": get_time_zone(),
+			"timeZone": time_zone,
 			},
 		"end": {
 			"dateTime": ends_on.isoformat(),
-			"timeZone": get_time_zone(),
+			"timeZone": time_zone,
 		}
 	}
 
@@ -492,16 +579,14 @@ def parse_google_calendar_recurrence_rule(repeat_day_week_number, repeat_day_nam
 		# a month has 4 weeks and hence itll return -1 for a month with 5 weeks.
 		repeat_day_week_number = 4
 
-	weekdays = get_weekdays()
+	weekdays = [day.lower() for day in get_weekdays()]
 	current_date = now_datetime()
-	isset_day_name, isset_day_number = False, False
 
 	# Set the proper day ie if recurrence is 4TH, then align the day to Thursday
-	while not isset_day_name:
-		isset_day_name = True if weekdays[current_date.weekday()].lower() == repeat_day_name else False
-		current_date = add_days(current_date, 1) if not isset_day_name else current_date
+	current_date = add_days(current_date, (weekdays.index(repeat_day_name) - current_date.weekday()) % 7)
 
 	# One the day is set to Thursday, now set the week number ie 4
+	isset_day_number = False
 	while not isset_day_number:
 		week_number = get_week_number(current_date)
 		isset_day_number = True if week_number == repeat_day_week_number else False
@@ -516,15 +601,15 @@ def repeat_on_to_google_calendar_recurrence_rule(doc):
 		Returns event (repeat_on) in Google Calendar format ie RRULE:FREQ=WEEKLY;BYDAY=MO,TU,TH
 	"""
 	recurrence = framework_frequencies.get(doc.repeat_on)
-	weekdays = get_weekdays()
 
 	if doc.repeat_on == "Weekly":
-		byday = [framework_days.get(day.lower()) for day in weekdays if doc.get(day.lower())]
-		recurrence = recurrence + "BYDAY=" + ",".join(byday)
+		# framework_days is ordered monday to sunday
+		byday = [google_calendar_day for day, google_calendar_day in framework_days.items() if doc.get(day)]
+		recurrence = f"{recurrence}BYDAY={','.join(byday)}"
 	elif doc.repeat_on == "Monthly":
-		week_number = str(get_week_number(get_datetime(doc.starts_on)))
-		week_day = weekdays[get_datetime(doc.starts_on).weekday()].lower()
-		recurrence = recurrence + "BYDAY=" + week_number + framework_days.get(week_day)
+		starts_on = get_datetime(doc.starts_on)
+		week_day = get_weekdays()[starts_on.weekday()].lower()
+		recurrence = f"{recurrence}BYDAY={get_week_number(starts_on)}{framework_days.get(week_day)}"
 
 	return [recurrence]
 
@@ -542,20 +627,16 @@ def get_week_number(dt):
 	return int(ceil(adjusted_dom/7.0))
 
 def get_recurrence_parameters(recurrence):
-	recurrence = recurrence.split(";")
-	frequency, until, byday = None, None, None
-
-	for r in recurrence:
-		if "RRULE:FREQ" in r:
-			frequency = r
-		elif "UNTIL" in r:
-			until = r
-		elif "BYDAY" in r:
-			byday = r
-		else:
-			pass
+	"""
+		Returns the FREQ, UNTIL and BYDAY parts of the recurrence rule eg
+		RRULE:FREQ=WEEKLY;WKST=SU;UNTIL=20191028;BYDAY=MO,WE -> RRULE:FREQ=WEEKLY, UNTIL=20191028, BYDAY=MO,WE
+	"""
+	parameters = {}
+
+	for r in recurrence.split(";"):
+		parameters[r.partition("=")[0]] = r
 
-	return frequency, until, byday
+	return parameters.get("RRULE:FREQ"), parameters.get("UNTIL"), parameters.get("BYDAY")
 
 """API Response
 	{
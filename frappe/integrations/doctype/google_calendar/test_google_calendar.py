@@ -0,0 +1,147 @@
+# Copyright (c) 2021, Frappe Technologies and Contributors
+# License: MIT. See LICENSE
+import unittest
+from datetime import datetime
+from unittest.mock import MagicMock, patch
+
+import frappe
+from frappe.integrations.doctype.google_calendar.google_calendar import (
+	get_recurrence_parameters,
+	get_week_number,
+	google_calendar_to_repeat_on,
+	parse_google_calendar_recurrence_rule,
+	sync_events_from_google_calendar,
+	update_event_in_calendar,
+)
+
+NOW_DATETIME = "frappe.integrations.doctype.google_calendar.google_calendar.now_datetime"
+GET_GOOGLE_CALENDAR_OBJECT = "frappe.integrations.doctype.google_calendar.google_calendar.get_google_calendar_object"
+
+
+class TestGoogleCalendar(unittest.TestCase):
+	def test_get_recurrence_parameters(self):
+		self.assertEqual(
+			get_recurrence_parameters("RRULE:FREQ=WEEKLY;WKST=SU;UNTIL=20191028;BYDAY=MO,WE"),
+			("RRULE:FREQ=WEEKLY", "UNTIL=20191028", "BYDAY=MO,WE")
+		)
+		self.assertEqual(
+			get_recurrence_parameters("RRULE:FREQ=DAILY"),
+			("RRULE:FREQ=DAILY", None, None)
+		)
+
+	def test_parse_google_calendar_recurrence_rule(self):
+		with patch(NOW_DATETIME, return_value=datetime(2024, 2, 12)):
+			# 4th thursday of February
+			self.assertEqual(parse_google_calendar_recurrence_rule(4, "thursday"), datetime(2024, 2, 22))
+			# last friday is treated as the 4th week
+			self.assertEqual(parse_google_calendar_recurrence_rule(-1, "friday"), datetime(2024, 2, 23))
+			# already on the requested day and week
+			self.assertEqual(parse_google_calendar_recurrence_rule(3, "monday"), datetime(2024, 2, 12))
+
+		with patch(NOW_DATETIME, return_value=datetime(2024, 3, 29)):
+			# aligning the day crosses into the next month
+			self.assertEqual(parse_google_calendar_recurrence_rule(1, "monday"), datetime(2024, 4, 1))
+
+	def test_google_calendar_to_repeat_on(self):
+		start, end = {"date": "2024-02-12"}, {"date": "2024-02-13"}
+
+		repeat_on = google_calendar_to_repeat_on(start, end)
+		self.assertEqual(repeat_on["all_day"], 1)
+		self.assertEqual(repeat_on["repeat_this_event"], 0)
+		self.assertIsNone(repeat_on["repeat_on"])
+
+		repeat_on = google_calendar_to_repeat_on(start, end, "RRULE:FREQ=WEEKLY;WKST=SU;UNTIL=20240331;BYDAY=MO,WE")
+		self.assertEqual(repeat_on["repeat_on"], "Weekly")
+		self.assertEqual(repeat_on["repeat_till"], datetime(2024, 3, 31))
+		self.assertEqual((repeat_on["monday"], repeat_on["tuesday"], repeat_on["wednesday"]), (1, 0, 1))
+
+		repeat_on = google_calendar_to_repeat_on(start, end, "RRULE:FREQ=DAILY;UNTIL=20240331")
+		self.assertEqual(repeat_on["repeat_on"], "Daily")
+		self.assertIsNone(repeat_on["ends_on"])
+
+		with patch(NOW_DATETIME, return_value=datetime(2024, 2, 12)):
+			repeat_on = google_calendar_to_repeat_on(start, end, "RRULE:FREQ=MONTHLY;BYDAY=4TH")
+		self.assertEqual(repeat_on["repeat_on"], "Monthly")
+		self.assertEqual(repeat_on["starts_on"], datetime(2024, 2, 22))
+		self.assertEqual(repeat_on["ends_on"], datetime(2024, 2, 22, 0, 5))
+
+		# only the first day is used when several are set
+		with patch(NOW_DATETIME, return_value=datetime(2024, 2, 12)):
+			repeat_on = google_calendar_to_repeat_on(start, end, "RRULE:FREQ=MONTHLY;BYDAY=1MO,3MO")
+		self.assertEqual(repeat_on["repeat_on"], "Monthly")
+		self.assertEqual(repeat_on["starts_on"].weekday(), 0)
+		self.assertEqual(get_week_number(repeat_on["starts_on"]), 1)
+
+	def test_update_event_in_calendar(self):
+		contact = frappe.get_doc({"doctype": "Contact", "first_name": "_Test Google Calendar Contact"}).insert()
+		self.addCleanup(frappe.delete_doc, "Contact", contact.name)
+
+		event = make_event(google_calendar_event_id="_test_update_event")
+		event.add_participant("Contact", contact.name)
+		event.save()
+		self.addCleanup(frappe.delete_doc, "Event", event.name)
+
+		google_calendar_event = {
+			"id": "_test_update_event",
+			"summary": event.subject,
+			"description": event.description,
+			"start": {"date": "2024-02-12"},
+			"end": {"date": "2024-02-13"},
+		}
+		modified = frappe.db.get_value("Event", event.name, "modified")
+
+		# an unchanged all day event is not saved again
+		update_event_in_calendar(None, google_calendar_event, event_name=event.name)
+		self.assertEqual(frappe.db.get_value("Event", event.name, "modified"), modified)
+
+		# a changed subject is saved and synced to the participants' Communications
+		google_calendar_event["summary"] = "_Test Google Calendar Event Updated"
+		update_event_in_calendar(None, google_calendar_event, event_name=event.name)
+		self.assertEqual(frappe.db.get_value("Event", event.name, "subject"), "_Test Google Calendar Event Updated")
+		self.assertEqual(
+			frappe.db.get_value("Communication", {"reference_doctype": "Event", "reference_name": event.name}, "subject"),
+			"_Test Google Calendar Event Updated"
+		)
+
+	def test_sync_closes_cancelled_events_of_the_account(self):
+		account = frappe._dict(name="_Test Google Calendar", google_calendar_id="_test_calendar_id",
+			pull_from_google_calendar=1, get_password=lambda **kwargs: None)
+
+		# the same Google Calendar Event synced by two accounts
+		own_event = make_event(google_calendar_event_id="_test_cancelled_event")
+		other_event = make_event(google_calendar_event_id="_test_cancelled_event")
+		frappe.db.set_value("Event", own_event.name, {
+			"google_calendar": account.name,
+			"google_calendar_id": account.google_calendar_id
+		})
+		frappe.db.set_value("Event", other_event.name, {
+			"google_calendar": "_Test Other Google Calendar",
+			"google_calendar_id": "_test_other_calendar_id"
+		})
+		self.addCleanup(frappe.delete_doc, "Event", own_event.name)
+		self.addCleanup(frappe.delete_doc, "Event", other_event.name)
+
+		google_calendar = MagicMock()
+		google_calendar.events.return_value.list.return_value.execute.return_value = {
+			"items": [{"id": "_test_cancelled_event", "status": "cancelled"}]
+		}
+
+		with patch(GET_GOOGLE_CALENDAR_OBJECT, return_value=(google_calendar, account)):
+			sync_events_from_google_calendar(account.name)
+
+		self.assertEqual(frappe.db.get_value("Event", own_event.name, "status"), "Closed")
+		self.assertEqual(frappe.db.get_value("Event", other_event.name, "status"), "Open")
+
+
+def make_event(**kwargs):
+	event = frappe.get_doc({
+		"doctype": "Event",
+		"subject": "_Test Google Calendar Event",
+		"description": "_Test Google Calendar Event Description",
+		"event_type": "Private",
+		"all_day": 1,
+		"starts_on": "2024-02-12 00:00:00",
+		"ends_on": "2024-02-13 00:00:00",
+	})
+	event.update(kwargs)
+	return event.insert()
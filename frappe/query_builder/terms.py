@@ -10,10 +10,11 @@ class NamedParameterWrapper:
 	"""Utility class to hold parameter values and keys"""
 
 	def __init__(self) -> None:
-		self.parameters = {}
+		# values are kept in order, `paramN` is the N-th value
+		self.parameters = []
 
 	def get_sql(self, param_value: Any, **kwargs) -> str:
-		"""returns SQL for a parameter, while adding the real value in a dict
+		"""returns SQL for a parameter, while adding the real value in a list
 
 		Args:
 				param_value (Any): Value of the parameter
@@ -21,9 +22,8 @@ class NamedParameterWrapper:
 		Returns:
 				str: parameter used in the SQL query
 		"""
-		param_key = f"%(param{len(self.parameters) + 1})s"
-		self.parameters[param_key[2:-2]] = param_value
-		return param_key
+		self.parameters.append(param_value)
+		return f"%(param{len(self.parameters)})s"
 
 	def get_parameters(self) -> Dict[str, Any]:
 		"""get dict with parameters and values
@@ -31,7 +31,7 @@ class NamedParameterWrapper:
 		Returns:
 				Dict[str, Any]: parameter dict
 		"""
-		return self.parameters
+		return {f"param{idx}": value for idx, value in enumerate(self.parameters, start=1)}
 
 
 class ParameterizedValueWrapper(ValueWrapper):
@@ -1,6 +1,6 @@
 from enum import Enum
-from importlib import import_module
-from typing import Any, Callable, Dict, Union, get_type_hints
+from functools import lru_cache
+from typing import Any, Callable, Dict, Type, Union, get_type_hints
 
 from pypika import Query
 from pypika.queries import Column
@@ -12,17 +12,20 @@ from frappe.query_builder.terms import NamedParameterWrapper
 from .builder import MariaDB, Postgres
 
 
-class db_type_is(Enum):
+class db_type_is(str, Enum):
 	MARIADB = "mariadb"
 	POSTGRES = "postgres"
 
+QUERY_BUILDERS = {db_type_is.MARIADB: MariaDB, db_type_is.POSTGRES: Postgres}
+
 class ImportMapper:
 	def __init__(self, func_map: Dict[db_type_is, Callable]) -> None:
 		self.func_map = func_map
 
 	def __call__(self, *args: Any, **kwds: Any) -> Callable:
-		db = db_type_is(frappe.conf.db_type or "mariadb")
-		return self.func_map[db](*args, **kwds)
+		# db_type_is members compare and hash as their values, so the
+		# configured db_type can be looked up without building the member
+		return self.func_map[frappe.conf.db_type or "mariadb"](*args, **kwds)
 
 class BuilderIdentificationFailed(Exception):
 	def __init__(self):
@@ -37,18 +40,16 @@ def get_query_builder(type_of_db: str) -> Union[Postgres, MariaDB]:
 	Returns:
 		Query: [Query object]
 	"""
-	db = db_type_is(type_of_db)
-	picks = {db_type_is.MARIADB: MariaDB, db_type_is.POSTGRES: Postgres}
-	return picks[db]
-
-def get_attr(method_string):
-	modulename = '.'.join(method_string.split('.')[:-1])
-	methodname = method_string.split('.')[-1]
-	return getattr(import_module(modulename), methodname)
+	return QUERY_BUILDERS[db_type_is(type_of_db)]
 
 def DocType(*args, **kwargs):
 	return frappe.qb.DocType(*args, **kwargs)
 
+@lru_cache(maxsize=None)
+def get_builder_class(query_class: Type[Union[Postgres, MariaDB]]):
+	"""Returns the QueryBuilder class used by `query_class`, resolved once per dialect"""
+	return get_type_hints(query_class._builder).get('return')
+
 def patch_query_execute():
 	"""Patch the Query Builder with helper execute method
 	This excludes the use of `frappe.db.sql` method while
@@ -59,13 +60,19 @@ def patch_query_execute():
 		return frappe.db.sql(query, params, *args, **kwargs) # nosemgrep
 
 	def prepare_query(query):
-		import inspect
+		import sys
 
 		param_collector = NamedParameterWrapper()
 		query = query.get_sql(param_wrapper=param_collector)
 		if frappe.flags.in_safe_exec and not query.lower().strip().startswith("select"):
-			callstack = inspect.stack()
-			if len(callstack) >= 3 and ".py" in callstack[2].filename:
+			# only the caller's frame is needed, inspect.stack() would
+			# also read source context for every frame in the stack
+			try:
+				caller_filename = sys._getframe(2).f_code.co_filename
+			except ValueError:
+				caller_filename = ""
+
+			if ".py" in caller_filename:
 				# ignore any query builder methods called from python files
 				# assumption is that those functions are whitelisted already.
 
@@ -77,14 +84,13 @@ def patch_query_execute():
 				#
 				# if frame2 is server script it wont have a filename and hence
 				# it shouldn't be allowed.
-				# ps. stack() returns `"<unknown>"` as filename.
+				# ps. its code object has `"<unknown>"` as filename.
 				pass
 			else:
 				raise frappe.PermissionError('Only SELECT SQL allowed in scripting')
 		return query, param_collector.get_parameters()
 
-	query_class = get_attr(str(frappe.qb).split("'")[1])
-	builder_class = get_type_hints(query_class._builder).get('return')
+	builder_class = get_builder_class(frappe.local.qb)
 
 	if not builder_class:
 		raise BuilderIdentificationFailed
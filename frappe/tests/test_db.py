@@ -301,6 +301,14 @@ class TestDB(unittest.TestCase):
 			# recover transaction to continue other tests
 			raise Exception
 
+	def test_bulk_insert(self):
+		names = [random_string(10) for _ in range(3)]
+		frappe.db.bulk_insert("ToDo", fields=["name", "description"],
+			values=[(name, "bulk insert") for name in names])
+
+		for name in names:
+			self.assertTrue(frappe.db.exists("ToDo", name))
+
 
 @run_only_if(db_type_is.MARIADB)
 class TestDDLCommandsMaria(unittest.TestCase):
@@ -7,10 +7,11 @@ from frappe.query_builder.functions import Coalesce, GroupConcat, Match
 from frappe.query_builder.utils import db_type_is
 from frappe.query_builder import Case
 
+# resolved once as the database type doesn't change during a test run
+ACTIVE_DB_TYPE = db_type_is(frappe.conf.db_type)
+
 def run_only_if(dbtype: db_type_is) -> Callable:
-	return unittest.skipIf(
-		db_type_is(frappe.conf.db_type) != dbtype, f"Only runs for {dbtype.value}"
-	)
+	return unittest.skipIf(ACTIVE_DB_TYPE != dbtype, f"Only runs for {dbtype.value}")
 
 
 @run_only_if(db_type_is.MARIADB)
@@ -62,20 +63,32 @@ class TestBuilderBase(object):
 	def test_run_patcher(self):
 		query = frappe.qb.from_("ToDo").select("*").limit(1)
 		data = query.run(as_dict=True)
-		self.assertTrue("run" in dir(query))
-		self.assertIsInstance(query.run, Callable)
+		self.assertTrue(hasattr(query, "run"))
+		self.assertTrue(callable(query.run))
 		self.assertIsInstance(data, list)
 
 
 class TestParameterization(unittest.TestCase):
+	@classmethod
+	def setUpClass(cls):
+		# pypika tables aren't modified by building queries on them, one is enough for all tests
+		cls.DocType = frappe.qb.DocType("DocType")
+		# same goes for the CASE shared by the select and update tests
+		cls.case = (
+			Case()
+			.when(cls.DocType.search_fields == "value", "other_value")
+			.when(Coalesce(cls.DocType.search_fields == "subject_in_function"), "true_value")
+			.else_("Overdue")
+		)
+
 	def test_where_conditions(self):
-		DocType = frappe.qb.DocType("DocType")
+		DocType = self.DocType
 		query = (
 			frappe.qb.from_(DocType)
 			.select(DocType.name)
 			.where((DocType.owner == "Administrator' --"))
 		)
-		self.assertTrue("walk" in dir(query))
+		self.assertTrue(hasattr(query, "walk"))
 		query, params = query.walk()
 
 		self.assertIn("%(param1)s", query)
@@ -83,10 +96,10 @@ class TestParameterization(unittest.TestCase):
 		self.assertEqual(params["param1"], "Administrator' --")
 
 	def test_set_cnoditions(self):
-		DocType = frappe.qb.DocType("DocType")
+		DocType = self.DocType
 		query = frappe.qb.update(DocType).set(DocType.value, "some_value")
 
-		self.assertTrue("walk" in dir(query))
+		self.assertTrue(hasattr(query, "walk"))
 		query, params = query.walk()
 
 		self.assertIn("%(param1)s", query)
@@ -94,14 +107,14 @@ class TestParameterization(unittest.TestCase):
 		self.assertEqual(params["param1"], "some_value")
 
 	def test_where_conditions_functions(self):
-		DocType = frappe.qb.DocType("DocType")
+		DocType = self.DocType
 		query = (
 			frappe.qb.from_(DocType)
 			.select(DocType.name)
 			.where(Coalesce(DocType.search_fields == "subject"))
 		)
 
-		self.assertTrue("walk" in dir(query))
+		self.assertTrue(hasattr(query, "walk"))
 		query, params = query.walk()
 
 		self.assertIn("%(param1)s", query)
@@ -109,18 +122,13 @@ class TestParameterization(unittest.TestCase):
 		self.assertEqual(params["param1"], "subject")
 
 	def test_case(self):
-		DocType = frappe.qb.DocType("DocType")
+		DocType = self.DocType
 		query = (
 			frappe.qb.from_(DocType)
-			.select(
-				Case()
-				.when(DocType.search_fields == "value", "other_value")
-				.when(Coalesce(DocType.search_fields == "subject_in_function"), "true_value")
-				.else_("Overdue")
-			)
+			.select(self.case)
 		)
 
-		self.assertTrue("walk" in dir(query))
+		self.assertTrue(hasattr(query, "walk"))
 		query, params = query.walk()
 
 		self.assertIn("%(param1)s", query)
@@ -132,19 +140,13 @@ class TestParameterization(unittest.TestCase):
 		self.assertEqual(params["param5"], "Overdue")
 
 	def test_case_in_update(self):
-		DocType = frappe.qb.DocType("DocType")
+		DocType = self.DocType
 		query = (
 			frappe.qb.update(DocType)
-			.set(
-				"parent",
-				Case()
-				.when(DocType.search_fields == "value", "other_value")
-				.when(Coalesce(DocType.search_fields == "subject_in_function"), "true_value")
-				.else_("Overdue")
-			)
+			.set("parent", self.case)
 		)
 
-		self.assertTrue("walk" in dir(query))
+		self.assertTrue(hasattr(query, "walk"))
 		query, params = query.walk()
 
 		self.assertIn("%(param1)s", query)
@@ -865,7 +865,9 @@ def groupby_metric(iterable: typing.Dict[str, list], key: str):
 			records.setdefault(item[key], {}).setdefault(category, []).append(item)
 	return records
 
+@functools.lru_cache(maxsize=4096)
 def get_table_name(table_name: str) -> str:
+	# cached as the same few DocType names are looked up for most queries
 	return f"tab{table_name}" if not table_name.startswith("__") else table_name
 
 def squashify(what):
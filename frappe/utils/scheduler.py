@@ -78,11 +78,11 @@ def enqueue_events_for_site(site):
 def enqueue_events(site):
 	if schedule_jobs_based_on_activity():
 		frappe.flags.enqueued_jobs = []
-		queued_jobs = get_jobs(site=site, key='job_type').get(site) or []
+		queued_jobs = set(get_jobs(site=site, key='job_type').get(site) or [])
 		for job_type in frappe.get_all('Scheduled Job Type', ('name', 'method'), dict(stopped=0)):
 			if not job_type.method in queued_jobs:
 				# don't add it to queue if still pending
-				frappe.get_doc('Scheduled Job Type', job_type.name).enqueue()
+				frappe.get_doc('Scheduled Job Type', job_type.name).enqueue(queued_jobs=queued_jobs)
 
 def is_scheduler_inactive():
 	if frappe.local.conf.maintenance_mode: